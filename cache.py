@@ -0,0 +1,207 @@
+# cache.py
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Tuple
+
+import pandas as pd
+import streamlit as st
+from sqlalchemy import select
+
+from db import db_session, get_engine
+from models import Capability, CompanyType, PrequalificationStatus, ProjectStatus
+from services import (
+    list_capabilities,
+    list_companies,
+    list_companies_with_capabilities,
+    list_projects,
+    list_project_requirements,
+    list_prequalification_responses_for_project,
+)
+
+# Reference data changes rarely, but Streamlit reruns the whole page on every
+# widget interaction. These wrappers serve those reruns from memory.
+# Call clear_cached_data() after any mutation that affects them.
+CACHE_TTL_SECONDS = 60
+
+# session_state key of the matching page's memoized ranking
+MATCHES_MEMO_KEY = "matches_memo"
+
+
+def clear_cached_data() -> None:
+    """
+    Drops every st.cache_data entry and the memoized matching ranking, which
+    session_state keeps across pages and is derived from the same data.
+    """
+    st.cache_data.clear()
+    st.session_state.pop(MATCHES_MEMO_KEY, None)
+
+
+class CapabilityRow(NamedTuple):
+    id: int
+    name: str
+    description: str | None
+
+
+class CompanyCapabilityRow(NamedTuple):
+    capability_name: str
+    experience_years: float | None
+    typical_project_size_m2: float | None
+    typical_contract_value_million: Decimal | None
+
+
+class CompanyRow(NamedTuple):
+    id: int
+    name: str
+    company_type: CompanyType
+    country: str | None
+    city: str | None
+    website: str | None
+    description: str | None
+    size_category: str | None
+    # Only filled by cached_list_companies_with_capabilities()
+    capabilities: Tuple[CompanyCapabilityRow, ...] = ()
+
+
+class ProjectRow(NamedTuple):
+    id: int
+    name: str
+    location: str | None
+    project_type: str | None
+    built_up_area_m2: float | None
+    estimated_budget_million: Decimal | None
+    status: ProjectStatus
+
+
+class ProjectRequirementRow(NamedTuple):
+    id: int
+    capability_id: int
+    capability_name: str
+    min_experience_years: float | None
+    min_contract_value_million: Decimal | None
+
+
+class PrequalificationResponseRow(NamedTuple):
+    id: int
+    status: PrequalificationStatus
+    notes: str | None
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_list_capabilities() -> List[CapabilityRow]:
+    with db_session() as db:
+        return [
+            CapabilityRow(id=cap.id, name=cap.name, description=cap.description)
+            for cap in list_capabilities(db)
+        ]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_capabilities_frame() -> pd.DataFrame:
+    """
+    Capability name/description table for st.dataframe, read straight into
+    pandas (no ORM instances).
+    """
+    stmt = select(
+        Capability.name.label("Capability"),
+        Capability.description.label("Description"),
+    ).order_by(Capability.name.asc())
+    return pd.read_sql_query(stmt, get_engine())
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_list_companies(
+    type_name: str | None = None,
+    name_prefix: str = "",
+    limit: int | None = None,
+) -> List[CompanyRow]:
+    """
+    type_name is the CompanyType value (e.g. "developer") so the cache key
+    stays a plain string.
+    """
+    company_type = CompanyType(type_name) if type_name else None
+    with db_session() as db:
+        return [
+            CompanyRow(**row._mapping)
+            for row in list_companies(db, company_type=company_type, name_prefix=name_prefix, limit=limit)
+        ]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_list_companies_with_capabilities(type_name: str | None = None) -> List[CompanyRow]:
+    company_type = CompanyType(type_name) if type_name else None
+    with db_session() as db:
+        return [
+            CompanyRow(
+                id=comp.id,
+                name=comp.name,
+                company_type=comp.company_type,
+                country=comp.country,
+                city=comp.city,
+                website=comp.website,
+                description=comp.description,
+                size_category=comp.size_category,
+                capabilities=tuple(
+                    CompanyCapabilityRow(
+                        capability_name=cc.capability.name,
+                        experience_years=cc.experience_years,
+                        typical_project_size_m2=cc.typical_project_size_m2,
+                        typical_contract_value_million=cc.typical_contract_value_million,
+                    )
+                    for cc in comp.capabilities
+                ),
+            )
+            for comp in list_companies_with_capabilities(db, company_type=company_type)
+        ]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_list_projects(
+    developer_company_id: int | None = None,
+    name_prefix: str = "",
+    limit: int | None = None,
+) -> List[ProjectRow]:
+    with db_session() as db:
+        return [
+            ProjectRow(
+                id=proj.id,
+                name=proj.name,
+                location=proj.location,
+                project_type=proj.project_type,
+                built_up_area_m2=proj.built_up_area_m2,
+                estimated_budget_million=proj.estimated_budget_million,
+                status=proj.status,
+            )
+            for proj in list_projects(
+                db,
+                developer_company_id=developer_company_id,
+                name_prefix=name_prefix,
+                limit=limit,
+            )
+        ]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_list_project_requirements(project_id: int) -> List[ProjectRequirementRow]:
+    with db_session() as db:
+        return [
+            ProjectRequirementRow(
+                id=r.id,
+                capability_id=r.capability_id,
+                capability_name=r.capability.name,
+                min_experience_years=r.min_experience_years,
+                min_contract_value_million=r.min_contract_value_million,
+            )
+            for r in list_project_requirements(db, project_id=project_id)
+        ]
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def cached_prequalification_responses(project_id: int) -> Dict[int, PrequalificationResponseRow]:
+    """
+    Existing decisions for a project keyed by contractor_company_id.
+    Call cached_prequalification_responses.clear() after saving decisions.
+    """
+    with db_session() as db:
+        return {
+            r.contractor_company_id: PrequalificationResponseRow(id=r.id, status=r.status, notes=r.notes)
+            for r in list_prequalification_responses_for_project(db, project_id=project_id)
+        }
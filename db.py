@@ -1,44 +1,179 @@
 # db.py
+from contextlib import contextmanager
+
 import streamlit as st
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 # In Streamlit Cloud, you'll set this in:
 # Settings -> Secrets -> add key: DB_URL
+# PostgreSQL runs on psycopg2 (requirements.txt): use postgresql+psycopg2://...
+# A bare postgresql:// URL is pinned to psycopg2 as well, since SQLAlchemy 2.1
+# would otherwise pick psycopg (v3), which isn't installed.
 DATABASE_URL = st.secrets["DB_URL"]
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
+
+def _database_url(url: str) -> URL:
+    parsed = make_url(url)
+    if parsed.drivername == "postgresql":
+        parsed = parsed.set(drivername="postgresql+psycopg2")
+    return parsed
+
+
+def _engine_options(url: URL) -> dict:
+    """
+    Driver-specific create_engine() options.
+
+    - Server databases get an explicitly sized QueuePool. pool_pre_ping is
+      off because behind PgBouncer in transaction mode every ping leaves a
+      backend "idle in transaction"; pool_recycle (kept below PgBouncer's
+      server_idle_timeout) retires stale connections instead.
+    - psycopg2 batches executemany() (UPDATE/DELETE) with execute_batch and
+      INSERTs with multi-row VALUES pages, instead of one round trip per row.
+    """
+    options = {"pool_pre_ping": False}
+    if url.get_backend_name() != "sqlite":
+        options.update(
+            poolclass=QueuePool,
+            pool_size=10,
+            max_overflow=5,
+            pool_recycle=60,
+            pool_timeout=30,
+        )
+    if url.get_driver_name() == "psycopg2":
+        options.update(
+            executemany_mode="values_plus_batch",
+            insertmanyvalues_page_size=1000,
+            executemany_batch_page_size=500,
+        )
+    return options
+
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and synchronous=NORMAL is safe under WAL (a power loss can
+# drop the last commits but never corrupts the file).
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # KiB, i.e. 64 MB
+    "PRAGMA mmap_size=268435456",  # 256 MB
 )
 
-# Session factory
-SessionLocal = scoped_session(
-    sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+@st.cache_resource
+def get_engine():
+    """
+    SQLAlchemy engine, created once per process.
+    Streamlit re-imports page modules on reruns / hot reloads; caching the
+    engine as a resource keeps a single connection pool instead of one per
+    import.
+    """
+    url = _database_url(DATABASE_URL)
+    engine = create_engine(url, **_engine_options(url))
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    _prepare_schema(engine)
+    return engine
+
+
+# Columns added to tables that existing databases already have.
+# create_all() never alters an existing table, so _add_missing_columns()
+# adds these with ALTER TABLE ... ADD COLUMN when they are absent.
+ADDED_COLUMNS = (
+    ("company_capabilities", "created_at"),
+    ("company_capabilities", "updated_at"),
+    ("project_requirements", "created_at"),
+    ("project_requirements", "updated_at"),
 )
 
-# Base class for ORM models
-Base = declarative_base()
 
+def _add_missing_columns(engine) -> None:
+    """
+    Adds the ADDED_COLUMNS an existing database lacks (idempotent).
+    SQLite can't ADD COLUMN with a non-constant default, so there the
+    server_default (now()) is left out: rows inserted without the column
+    keep NULL, while PostgreSQL stamps existing and new rows.
+    """
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            if column_name in {col["name"] for col in existing.get_columns(table_name)}:
+                continue
+            column = Base.metadata.tables[table_name].c[column_name]
+            column_type = column.type.compile(dialect=engine.dialect)
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"
+            if column.server_default is not None and engine.dialect.name != "sqlite":
+                ddl += " DEFAULT now()"
+            conn.execute(text(ddl))
+
+
+def _prepare_schema(engine) -> None:
+    """
+    Creates missing tables and columns, then backfills project_match_cache.
+    Runs with the engine (once per process) because Streamlit executes only
+    the opened page script, so a page reached directly never goes through
+    app.py.
+    """
+    import models  # noqa: F401  # Ensure models are registered
+    from services import backfill_project_match_cache
+
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    with Session(engine) as db:
+        backfill_project_match_cache(db)
 
-def get_db():
+
+@st.cache_resource
+def get_session_factory():
+    """
+    Session factory bound to the cached engine (also one per process).
+    expire_on_commit=False keeps loaded attributes readable after commit /
+    close instead of re-SELECTing them on first access.
     """
-    Dependency-style generator to get a DB session.
+    return sessionmaker(bind=get_engine(), autoflush=False, expire_on_commit=False)
+
+
+# Base class for ORM models (SQLAlchemy 2.0 typed declarative mappings)
+class Base(DeclarativeBase):
+    pass
+
+
+@contextmanager
+def db_session():
+    """
+    Request-bound DB session: commits on success, rolls back on error and
+    always closes (returning the connection to the pool).
     Use it like:
-        db = next(get_db())
+        with db_session() as db:
+            companies = list_companies(db)
     """
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
 
 
 def init_db():
     """
-    Import models and create tables in the DB.
-    Call this once at startup from app.py.
+    Make sure the DB schema is ready. Called from app.py on every rerun; the
+    work itself (create_all(), new columns and the match cache backfill) runs
+    once per process with the cached engine, whichever page is opened first.
     """
-    import models  # noqa: F401  # Ensure models are registered
-    Base.metadata.create_all(bind=engine)
+    get_engine()
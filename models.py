@@ -1,19 +1,23 @@
 # models.py
 import enum
+from datetime import datetime
+from decimal import Decimal
+from typing import List
 
 from sqlalchemy import (
-    Column,
-    Integer,
     String,
     Text,
     Enum,
     ForeignKey,
+    Index,
     Float,
+    Numeric,
+    CheckConstraint,
     DateTime,
     func,
     UniqueConstraint,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db import Base
 
@@ -26,31 +30,28 @@ class CompanyType(enum.Enum):
 class Company(Base):
     __tablename__ = "companies"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, unique=True)
-    company_type = Column(Enum(CompanyType), nullable=False, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(255), unique=True)
+    company_type: Mapped[CompanyType] = mapped_column(Enum(CompanyType), index=True)
 
-    country = Column(String(100), nullable=True)
-    city = Column(String(100), nullable=True)
-    website = Column(String(255), nullable=True)
-    description = Column(Text, nullable=True)
-    size_category = Column(String(50), nullable=True)  # "small", "medium", "large" etc.
+    country: Mapped[str | None] = mapped_column(String(100))
+    city: Mapped[str | None] = mapped_column(String(100))
+    website: Mapped[str | None] = mapped_column(String(255))
+    description: Mapped[str | None] = mapped_column(Text)
+    size_category: Mapped[str | None] = mapped_column(String(50))  # "small", "medium", "large" etc.
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    capabilities = relationship(
-        "CompanyCapability",
+    capabilities: Mapped[List["CompanyCapability"]] = relationship(
         back_populates="company",
         cascade="all, delete-orphan",
     )
-    projects = relationship(
-        "Project",
+    projects: Mapped[List["Project"]] = relationship(
         back_populates="developer",
         cascade="all, delete-orphan",
     )
-    prequalification_responses = relationship(
-        "PrequalificationResponse",
+    prequalification_responses: Mapped[List["PrequalificationResponse"]] = relationship(
         back_populates="contractor",
         cascade="all, delete-orphan",
     )
@@ -59,20 +60,27 @@ class Company(Base):
         return f"<Company id={self.id} name={self.name} type={self.company_type.value}>"
 
 
+# Case-insensitive name prefix search (services.list_companies(name_prefix=...)).
+# text_pattern_ops lets PostgreSQL use the index for LIKE 'abc%' under any collation.
+Index(
+    "ix_companies_name_lower_pattern",
+    func.lower(Company.name).label("name_lower"),
+    postgresql_ops={"name_lower": "text_pattern_ops"},
+)
+
+
 class Capability(Base):
     __tablename__ = "capabilities"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, unique=True)
-    description = Column(Text, nullable=True)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    name: Mapped[str] = mapped_column(String(255), unique=True)
+    description: Mapped[str | None] = mapped_column(Text)
 
-    company_capabilities = relationship(
-        "CompanyCapability",
+    company_capabilities: Mapped[List["CompanyCapability"]] = relationship(
         back_populates="capability",
         cascade="all, delete-orphan",
     )
-    project_requirements = relationship(
-        "ProjectRequirement",
+    project_requirements: Mapped[List["ProjectRequirement"]] = relationship(
         back_populates="capability",
         cascade="all, delete-orphan",
     )
@@ -84,19 +92,33 @@ class Capability(Base):
 class CompanyCapability(Base):
     __tablename__ = "company_capabilities"
     __table_args__ = (
+        # Also serves lookups by company_id (leading column)
         UniqueConstraint("company_id", "capability_id", name="uq_company_capability"),
+        # "Which companies have capability X"; INCLUDE makes matching an index-only scan on PostgreSQL
+        Index(
+            "ix_company_capability_cap",
+            "capability_id",
+            postgresql_include=["company_id", "experience_years", "typical_contract_value_million"],
+        ),
+        CheckConstraint("experience_years >= 0", name="ck_company_capability_exp_nonneg"),
+        CheckConstraint("typical_project_size_m2 >= 0", name="ck_company_capability_size_nonneg"),
+        CheckConstraint("typical_contract_value_million >= 0", name="ck_company_capability_value_nonneg"),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
-    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
-    capability_id = Column(Integer, ForeignKey("capabilities.id", ondelete="CASCADE"), nullable=False)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    company_id: Mapped[int] = mapped_column(ForeignKey("companies.id", ondelete="CASCADE"))
+    capability_id: Mapped[int] = mapped_column(ForeignKey("capabilities.id", ondelete="CASCADE"))
+
+    experience_years: Mapped[float | None] = mapped_column(Float)  # e.g. 5.0 years
+    typical_project_size_m2: Mapped[float | None] = mapped_column(Float)
+    typical_contract_value_million: Mapped[Decimal | None] = mapped_column(Numeric(12, 2))  # in million EGP/USD, etc.
 
-    experience_years = Column(Float, nullable=True)  # e.g. 5.0 years
-    typical_project_size_m2 = Column(Float, nullable=True)
-    typical_contract_value_million = Column(Float, nullable=True)  # in million EGP/USD, etc.
+    # Compared with project_match_cache.updated_at to detect a stale cache
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
-    company = relationship("Company", back_populates="capabilities")
-    capability = relationship("Capability", back_populates="company_capabilities")
+    company: Mapped["Company"] = relationship(back_populates="capabilities")
+    capability: Mapped["Capability"] = relationship(back_populates="company_capabilities")
 
     def __repr__(self) -> str:
         return f"<CompanyCapability company_id={self.company_id} capability_id={self.capability_id}>"
@@ -110,34 +132,34 @@ class ProjectStatus(enum.Enum):
 
 class Project(Base):
     __tablename__ = "projects"
+    __table_args__ = (
+        CheckConstraint("built_up_area_m2 >= 0", name="ck_project_bua_nonneg"),
+        CheckConstraint("estimated_budget_million >= 0", name="ck_project_budget_nonneg"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    developer_company_id = Column(
-        Integer,
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    developer_company_id: Mapped[int] = mapped_column(
         ForeignKey("companies.id", ondelete="CASCADE"),
-        nullable=False,
     )
 
-    name = Column(String(255), nullable=False)
-    location = Column(String(255), nullable=True)
-    project_type = Column(String(100), nullable=True)  # e.g. "Residential", "Commercial"
-    description = Column(Text, nullable=True)
+    name: Mapped[str] = mapped_column(String(255))
+    location: Mapped[str | None] = mapped_column(String(255))
+    project_type: Mapped[str | None] = mapped_column(String(100))  # e.g. "Residential", "Commercial"
+    description: Mapped[str | None] = mapped_column(Text)
 
-    built_up_area_m2 = Column(Float, nullable=True)
-    estimated_budget_million = Column(Float, nullable=True)
+    built_up_area_m2: Mapped[float | None] = mapped_column(Float)
+    estimated_budget_million: Mapped[Decimal | None] = mapped_column(Numeric(12, 2))
 
-    status = Column(Enum(ProjectStatus), nullable=False, default=ProjectStatus.DRAFT)
+    status: Mapped[ProjectStatus] = mapped_column(Enum(ProjectStatus), default=ProjectStatus.DRAFT)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
-    developer = relationship("Company", back_populates="projects")
-    requirements = relationship(
-        "ProjectRequirement",
+    developer: Mapped["Company"] = relationship(back_populates="projects")
+    requirements: Mapped[List["ProjectRequirement"]] = relationship(
         back_populates="project",
         cascade="all, delete-orphan",
     )
-    prequalification_responses = relationship(
-        "PrequalificationResponse",
+    prequalification_responses: Mapped[List["PrequalificationResponse"]] = relationship(
         back_populates="project",
         cascade="all, delete-orphan",
     )
@@ -148,24 +170,31 @@ class Project(Base):
 
 class ProjectRequirement(Base):
     __tablename__ = "project_requirements"
+    __table_args__ = (
+        # Matching filters on project_id and joins on capability_id; one index serves both
+        Index("ix_project_requirement_project_cap", "project_id", "capability_id"),
+        Index("ix_project_requirement_cap", "capability_id"),
+        CheckConstraint("min_experience_years >= 0", name="ck_project_requirement_exp_nonneg"),
+        CheckConstraint("min_contract_value_million >= 0", name="ck_project_requirement_value_nonneg"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(
-        Integer,
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    project_id: Mapped[int] = mapped_column(
         ForeignKey("projects.id", ondelete="CASCADE"),
-        nullable=False,
     )
-    capability_id = Column(
-        Integer,
+    capability_id: Mapped[int] = mapped_column(
         ForeignKey("capabilities.id", ondelete="CASCADE"),
-        nullable=False,
     )
 
-    min_experience_years = Column(Float, nullable=True)
-    min_contract_value_million = Column(Float, nullable=True)
+    min_experience_years: Mapped[float | None] = mapped_column(Float)
+    min_contract_value_million: Mapped[Decimal | None] = mapped_column(Numeric(12, 2))
+
+    # Compared with project_match_cache.updated_at to detect a stale cache
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
-    project = relationship("Project", back_populates="requirements")
-    capability = relationship("Capability", back_populates="project_requirements")
+    project: Mapped["Project"] = relationship(back_populates="requirements")
+    capability: Mapped["Capability"] = relationship(back_populates="project_requirements")
 
     def __repr__(self) -> str:
         return f"<ProjectRequirement project_id={self.project_id} capability_id={self.capability_id}>"
@@ -188,25 +217,54 @@ class PrequalificationResponse(Base):
         ),
     )
 
-    id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(
-        Integer,
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    project_id: Mapped[int] = mapped_column(
         ForeignKey("projects.id", ondelete="CASCADE"),
-        nullable=False,
     )
-    contractor_company_id = Column(
-        Integer,
+    contractor_company_id: Mapped[int] = mapped_column(
         ForeignKey("companies.id", ondelete="CASCADE"),
-        nullable=False,
     )
 
-    status = Column(Enum(PrequalificationStatus), nullable=False, default=PrequalificationStatus.INTERESTED)
-    notes = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    status: Mapped[PrequalificationStatus] = mapped_column(
+        Enum(PrequalificationStatus),
+        default=PrequalificationStatus.INTERESTED,
+    )
+    notes: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
-    project = relationship("Project", back_populates="prequalification_responses")
-    contractor = relationship("Company", back_populates="prequalification_responses")
+    project: Mapped["Project"] = relationship(back_populates="prequalification_responses")
+    contractor: Mapped["Company"] = relationship(back_populates="prequalification_responses")
 
     def __repr__(self) -> str:
         return f"<PrequalificationResponse project_id={self.project_id} contractor_company_id={self.contractor_company_id}>"
+
+
+class ProjectMatchCache(Base):
+    """
+    Precomputed matching: how many of a project's required capabilities each
+    contractor has (matched_count) and how many of those also meet the
+    requirement's experience / contract value thresholds (score). Kept
+    current by services.refresh_project_match_cache() whenever requirements
+    or company capabilities are written; services.backfill_project_match_cache()
+    recomputes, once per process, projects whose rows are older than their
+    requirements or the contractors' capabilities (updated_at against their
+    created_at / updated_at).
+    """
+    __tablename__ = "project_match_cache"
+
+    project_id: Mapped[int] = mapped_column(
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    contractor_company_id: Mapped[int] = mapped_column(
+        ForeignKey("companies.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    matched_count: Mapped[int]
+    score: Mapped[int]
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"<ProjectMatchCache project_id={self.project_id} contractor_company_id={self.contractor_company_id}>"
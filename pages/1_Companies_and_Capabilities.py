@@ -1,16 +1,28 @@
 # pages/1_Companies_and_Capabilities.py
 
+import pandas as pd
 import streamlit as st
 
-from db import get_db
-from models import CompanyType
+from cache import (
+    cached_capabilities_frame,
+    cached_list_capabilities,
+    cached_list_companies_with_capabilities,
+    clear_cached_data,
+)
+from db import db_session
 from services import (
     create_company,
-    list_companies,
     create_capability,
-    list_capabilities,
     add_capability_to_company,
-    list_company_capabilities,
+)
+from ui import (
+    COMPANY_FILTER_BY_LABEL,
+    COMPANY_FILTER_OPTIONS,
+    COMPANY_SIZE_OPTIONS,
+    COMPANY_TYPE_BY_LABEL,
+    COMPANY_TYPE_OPTIONS,
+    set_form_feedback,
+    show_form_feedback,
 )
 
 st.title("Companies & Capabilities")
@@ -22,6 +34,70 @@ and manage **developers / contractors** with their specializations.
 """
 )
 
+
+# ---------------------------------------------------------
+# Form callbacks (see ui.py)
+# ---------------------------------------------------------
+
+
+def _create_capability_submitted():
+    cap_name = st.session_state["cap_name"].strip()
+    if not cap_name:
+        set_form_feedback("create_capability_form", "error", "Capability name is required.")
+        return
+    try:
+        with db_session() as db:
+            create_capability(db, name=cap_name, description=st.session_state["cap_desc"].strip() or None)
+        clear_cached_data()
+        set_form_feedback("create_capability_form", "success", f"Capability **{cap_name}** created.")
+    except Exception as e:
+        set_form_feedback("create_capability_form", "error", f"Could not create capability: {e}")
+
+
+def _create_company_submitted():
+    name = st.session_state["company_name"].strip()
+    if not name:
+        set_form_feedback("create_company_form", "error", "Company name is required.")
+        return
+    company_type_label = st.session_state["company_type_label"]
+    company_type = COMPANY_TYPE_BY_LABEL[company_type_label]
+    try:
+        with db_session() as db:
+            create_company(
+                db=db,
+                name=name,
+                company_type=company_type,
+                country=st.session_state["company_country"].strip() or None,
+                city=st.session_state["company_city"].strip() or None,
+                website=st.session_state["company_website"].strip() or None,
+                description=st.session_state["company_description"].strip() or None,
+                size_category=st.session_state["company_size_category"] or None,
+            )
+        clear_cached_data()
+        set_form_feedback("create_company_form", "success", f"{company_type_label} **{name}** created.")
+    except Exception as e:
+        set_form_feedback("create_company_form", "error", f"Could not create company: {e}")
+
+
+def _company_capability_submitted(company_options: dict, cap_options: dict):
+    company_label = st.session_state["cap_company_select"]
+    cap_name = st.session_state["cap_select"]
+    try:
+        with db_session() as db:
+            add_capability_to_company(
+                db=db,
+                company_id=company_options[company_label],
+                capability_id=cap_options[cap_name],
+                experience_years=st.session_state["exp_years"],
+                typical_project_size_m2=st.session_state["typical_size"],
+                typical_contract_value_million=st.session_state["typical_value"],
+            )
+        clear_cached_data()
+        set_form_feedback("company_capability_form", "success", f"Capability **{cap_name}** saved for **{company_label}**.")
+    except Exception as e:
+        set_form_feedback("company_capability_form", "error", f"Could not save capability: {e}")
+
+
 tab_caps, tab_companies = st.tabs(["⚙️ Capabilities", "🏢 Companies"])
 
 
@@ -32,32 +108,25 @@ with tab_caps:
     st.subheader("Create a new capability")
 
     with st.form("create_capability_form"):
-        cap_name = st.text_input("Capability name", help="e.g. Residential High-Rise, Villas Compounds, Hospitals")
-        cap_desc = st.text_area("Description", help="Optional notes about this capability.")
-        submitted_cap = st.form_submit_button("Add capability")
-
-        if submitted_cap:
-            if not cap_name.strip():
-                st.error("Capability name is required.")
-            else:
-                db = next(get_db())
-                try:
-                    create_capability(db, name=cap_name.strip(), description=cap_desc.strip() or None)
-                    st.success(f"Capability **{cap_name}** created.")
-                except Exception as e:
-                    st.error(f"Could not create capability: {e}")
+        st.text_input(
+            "Capability name",
+            help="e.g. Residential High-Rise, Villas Compounds, Hospitals",
+            key="cap_name",
+        )
+        st.text_area("Description", help="Optional notes about this capability.", key="cap_desc")
+        st.form_submit_button("Add capability", on_click=_create_capability_submitted)
+
+        show_form_feedback("create_capability_form")
 
     st.markdown("---")
     st.subheader("Existing capabilities")
 
-    db = next(get_db())
-    caps = list_capabilities(db)
+    caps_df = cached_capabilities_frame()
 
-    if not caps:
+    if caps_df.empty:
         st.info("No capabilities defined yet. Create one above.")
     else:
-        for cap in caps:
-            st.write(f"- **{cap.name}** – {cap.description or '_No description_'}")
+        st.dataframe(caps_df, hide_index=True, width="stretch")
 
 
 # ---------------------------------------------------------
@@ -66,45 +135,25 @@ with tab_caps:
 with tab_companies:
     st.subheader("Create a new company")
 
-    company_type_label = st.radio(
+    st.radio(
         "Company type",
-        options=["Developer", "Contractor"],
+        options=COMPANY_TYPE_OPTIONS,
         horizontal=True,
         help="Developers create projects. Contractors bid / prequalify for them.",
+        key="company_type_label",
     )
-    company_type = CompanyType.DEVELOPER if company_type_label == "Developer" else CompanyType.CONTRACTOR
-
-    size_options = ["", "Small", "Medium", "Large", "Mega"]
 
     with st.form("create_company_form"):
-        name = st.text_input("Company name")
-        country = st.text_input("Country", value="Egypt")
-        city = st.text_input("City")
-        website = st.text_input("Website")
-        size_category = st.selectbox("Size category (optional)", options=size_options)
-        description = st.text_area("Short description", height=80)
-
-        submitted_company = st.form_submit_button("Create company")
-
-        if submitted_company:
-            if not name.strip():
-                st.error("Company name is required.")
-            else:
-                db = next(get_db())
-                try:
-                    create_company(
-                        db=db,
-                        name=name.strip(),
-                        company_type=company_type,
-                        country=country.strip() or None,
-                        city=city.strip() or None,
-                        website=website.strip() or None,
-                        description=description.strip() or None,
-                        size_category=size_category or None,
-                    )
-                    st.success(f"{company_type_label} **{name}** created.")
-                except Exception as e:
-                    st.error(f"Could not create company: {e}")
+        st.text_input("Company name", key="company_name")
+        st.text_input("Country", value="Egypt", key="company_country")
+        st.text_input("City", key="company_city")
+        st.text_input("Website", key="company_website")
+        st.selectbox("Size category (optional)", options=COMPANY_SIZE_OPTIONS, key="company_size_category")
+        st.text_area("Short description", height=80, key="company_description")
+
+        st.form_submit_button("Create company", on_click=_create_company_submitted)
+
+        show_form_feedback("create_company_form")
 
     st.markdown("---")
 
@@ -113,90 +162,105 @@ with tab_companies:
 
     company_filter_label = st.selectbox(
         "Filter by company type",
-        options=["All", "Developers only", "Contractors only"],
+        options=COMPANY_FILTER_OPTIONS,
         index=0,
     )
+    filter_type = COMPANY_FILTER_BY_LABEL[company_filter_label]
 
-    filter_type: CompanyType | None
-    if company_filter_label == "Developers only":
-        filter_type = CompanyType.DEVELOPER
-    elif company_filter_label == "Contractors only":
-        filter_type = CompanyType.CONTRACTOR
-    else:
-        filter_type = None
-
-    db = next(get_db())
-    companies = list_companies(db, company_type=filter_type)
+    companies = cached_list_companies_with_capabilities(filter_type.value if filter_type else None)
 
-    all_capabilities = list_capabilities(db)
+    all_capabilities = cached_list_capabilities()
+    cap_options = {cap.name: cap.id for cap in all_capabilities}
+    cap_names = list(cap_options.keys())
 
     if not companies:
         st.info("No companies found yet.")
     else:
-        for comp in companies:
-            with st.expander(f"[{comp.id}] {comp.name} ({comp.company_type.value})", expanded=False):
-                st.write(f"**Location:** {(comp.city or '')}, {(comp.country or '')}")
-                st.write(f"**Website:** {comp.website or '-'}")
-                st.write(f"**Size:** {comp.size_category or '-'}")
-                st.write(f"**Description:** {comp.description or '-'}")
-
-                st.markdown("### Capabilities")
-
-                # Show current capabilities
-                company_caps = list_company_capabilities(db, company_id=comp.id)
-                if not company_caps:
-                    st.info("No capabilities assigned yet.")
-                else:
-                    for cc in company_caps:
-                        st.write(
-                            f"- **{cc.capability.name}** "
-                            f"(exp: {cc.experience_years or '-'} years, "
-                            f"typical contract: {cc.typical_contract_value_million or '-'} M, "
-                            f"size: {cc.typical_project_size_m2 or '-'} m²)"
-                        )
-
-                st.markdown("#### Add / update capability")
-
-                if not all_capabilities:
-                    st.warning("You need to create capabilities in the first tab before assigning them.")
-                else:
-                    cap_options = {cap.name: cap.id for cap in all_capabilities}
-                    selected_cap_name = st.selectbox(
-                        f"Capability for {comp.name}",
-                        options=list(cap_options.keys()),
-                        key=f"cap_select_{comp.id}",
-                    )
-                    selected_cap_id = cap_options[selected_cap_name]
-
-                    exp_years = st.number_input(
-                        "Experience (years)",
-                        min_value=0.0,
-                        step=0.5,
-                        key=f"exp_years_{comp.id}",
-                    )
-                    typical_size = st.number_input(
-                        "Typical project size (m²)",
-                        min_value=0.0,
-                        step=100.0,
-                        key=f"size_{comp.id}",
-                    )
-                    typical_value = st.number_input(
-                        "Typical contract value (million)",
-                        min_value=0.0,
-                        step=1.0,
-                        key=f"value_{comp.id}",
-                    )
-
-                    if st.button("Save capability for this company", key=f"save_cap_{comp.id}"):
-                        try:
-                            add_capability_to_company(
-                                db=db,
-                                company_id=comp.id,
-                                capability_id=selected_cap_id,
-                                experience_years=exp_years or None,
-                                typical_project_size_m2=typical_size or None,
-                                typical_contract_value_million=typical_value or None,
-                            )
-                            st.success("Capability saved for this company. Scroll up or collapse/expand to refresh.")
-                        except Exception as e:
-                            st.error(f"Could not save capability: {e}")
+        companies_df = pd.DataFrame(
+            [
+                {
+                    "ID": comp.id,
+                    "Name": comp.name,
+                    "Type": comp.company_type.value,
+                    "City": comp.city,
+                    "Country": comp.country,
+                    "Website": comp.website,
+                    "Size": comp.size_category,
+                    "Description": comp.description,
+                    "Capabilities": [cc.capability_name for cc in comp.capabilities],
+                }
+                for comp in companies
+            ]
+        )
+        st.dataframe(
+            companies_df,
+            hide_index=True,
+            width="stretch",
+            column_config={"Capabilities": st.column_config.ListColumn("Capabilities")},
+        )
+
+        st.markdown("### Capabilities")
+
+        company_caps_df = pd.DataFrame(
+            [
+                {
+                    "Company": comp.name,
+                    "Capability": cc.capability_name,
+                    "Experience (years)": cc.experience_years,
+                    "Typical contract (M)": cc.typical_contract_value_million,
+                    "Typical size (m²)": cc.typical_project_size_m2,
+                }
+                for comp in companies
+                for cc in comp.capabilities
+            ]
+        )
+        if company_caps_df.empty:
+            st.info("No capabilities assigned yet.")
+        else:
+            st.dataframe(company_caps_df, hide_index=True, width="stretch")
+
+        st.markdown("#### Add / update capability for a company")
+
+        if not all_capabilities:
+            st.warning("You need to create capabilities in the first tab before assigning them.")
+        else:
+            company_options = {f"[{comp.id}] {comp.name}": comp.id for comp in companies}
+
+            with st.form("company_capability_form"):
+                st.selectbox(
+                    "Company",
+                    options=list(company_options.keys()),
+                    key="cap_company_select",
+                )
+                st.selectbox(
+                    "Capability",
+                    options=cap_names,
+                    key="cap_select",
+                )
+
+                st.number_input(
+                    "Experience (years)",
+                    min_value=0.0,
+                    step=0.5,
+                    key="exp_years",
+                )
+                st.number_input(
+                    "Typical project size (m²)",
+                    min_value=0.0,
+                    step=100.0,
+                    key="typical_size",
+                )
+                st.number_input(
+                    "Typical contract value (million)",
+                    min_value=0.0,
+                    step=1.0,
+                    key="typical_value",
+                )
+
+                st.form_submit_button(
+                    "Save capability for this company",
+                    on_click=_company_capability_submitted,
+                    args=(company_options, cap_options),
+                )
+
+                show_form_feedback("company_capability_form")
@@ -1,16 +1,22 @@
 # pages/2_Projects_and_Requirements.py
 
+import pandas as pd
 import streamlit as st
 
-from db import get_db
-from models import CompanyType, ProjectStatus
+from cache import cached_list_capabilities, clear_cached_data
+from db import db_session
 from services import (
-    list_companies,
-    list_capabilities,
     create_project,
-    list_projects,
+    list_projects_with_requirements,
     add_project_requirement,
-    list_project_requirements,
+)
+from ui import (
+    PROJECT_STATUS_BY_LABEL,
+    PROJECT_STATUS_OPTIONS,
+    PROJECT_TYPE_OPTIONS,
+    select_developer,
+    set_form_feedback,
+    show_form_feedback,
 )
 
 st.title("Projects & Requirements")
@@ -24,27 +30,65 @@ Later, the matching engine will use these requirements to rank contractors.
 """
 )
 
-db = next(get_db())
 
 # ---------------------------------------
-# 1) Choose developer
+# Form callbacks (see ui.py)
 # ---------------------------------------
-st.subheader("1. Select developer company")
 
-developers = list_companies(db, company_type=CompanyType.DEVELOPER)
 
-if not developers:
-    st.warning("No developer companies found. Go to **Companies & Capabilities** page and create at least one Developer.")
-    st.stop()
+def _create_project_submitted(developer_company_id: int, developer_name: str):
+    name = st.session_state["project_name"].strip()
+    if not name:
+        set_form_feedback("create_project_form", "error", "Project name is required.")
+        return
+    try:
+        with db_session() as db:
+            project = create_project(
+                db=db,
+                developer_company_id=developer_company_id,
+                name=name,
+                location=st.session_state["project_location"].strip() or None,
+                project_type=st.session_state["project_type"] or None,
+                description=st.session_state["project_description"].strip() or None,
+                built_up_area_m2=st.session_state["project_bua"],
+                estimated_budget_million=st.session_state["project_budget"],
+                status=PROJECT_STATUS_BY_LABEL[st.session_state["project_status"]],
+            )
+        clear_cached_data()
+        set_form_feedback(
+            "create_project_form",
+            "success",
+            f"Project **{project.name}** created for developer **{developer_name}**.",
+        )
+    except Exception as e:
+        set_form_feedback("create_project_form", "error", f"Could not create project: {e}")
+
+
+def _add_requirement_submitted(proj_options: dict, cap_options: dict):
+    project_label = st.session_state["req_project_select"]
+    cap_name = st.session_state["cap_select_proj"]
+    try:
+        with db_session() as db:
+            add_project_requirement(
+                db=db,
+                project_id=proj_options[project_label],
+                capability_id=cap_options[cap_name],
+                min_experience_years=st.session_state["min_exp"],
+                min_contract_value_million=st.session_state["min_value"],
+            )
+        clear_cached_data()
+        set_form_feedback("add_req_form", "success", f"Requirement **{cap_name}** added to **{project_label}**.")
+    except Exception as e:
+        set_form_feedback("add_req_form", "error", f"Could not add requirement: {e}")
 
-dev_options = {f"[{c.id}] {c.name}": c.id for c in developers}
-selected_dev_label = st.selectbox(
-    "Developer",
-    options=list(dev_options.keys()),
-)
-selected_dev_id = dev_options[selected_dev_label]
 
-selected_dev = next((d for d in developers if d.id == selected_dev_id), None)
+# ---------------------------------------
+# 1) Choose developer
+# ---------------------------------------
+st.subheader("1. Select developer company")
+
+selected_dev = select_developer()
+selected_dev_id = selected_dev.id
 st.info(f"Selected developer: **{selected_dev.name}**")
 
 
@@ -53,70 +97,43 @@ st.info(f"Selected developer: **{selected_dev.name}**")
 # ---------------------------------------
 st.subheader("2. Create a new project")
 
-project_type_default_options = [
-    "",
-    "Residential Compound",
-    "Residential Towers",
-    "Commercial Mall",
-    "Mixed-use",
-    "Industrial",
-    "Infrastructure",
-]
-
-status_options_map = {
-    "Draft": ProjectStatus.DRAFT,
-    "Open": ProjectStatus.OPEN,
-    "Closed": ProjectStatus.CLOSED,
-}
-
 with st.form("create_project_form"):
-    name = st.text_input("Project name", help="e.g. New Cairo Residential Compound")
-    location = st.text_input("Location", help="City / Area, e.g. New Cairo, 6th of October, etc.")
-    project_type = st.selectbox("Project type", options=project_type_default_options)
-    description = st.text_area("Short description", height=100)
+    st.text_input("Project name", help="e.g. New Cairo Residential Compound", key="project_name")
+    st.text_input("Location", help="City / Area, e.g. New Cairo, 6th of October, etc.", key="project_location")
+    st.selectbox("Project type", options=PROJECT_TYPE_OPTIONS, key="project_type")
+    st.text_area("Short description", height=100, key="project_description")
 
     col1, col2 = st.columns(2)
     with col1:
-        built_up_area_m2 = st.number_input(
+        st.number_input(
             "Built-up area (m²)",
             min_value=0.0,
             step=1000.0,
             format="%.2f",
+            key="project_bua",
         )
     with col2:
-        estimated_budget_million = st.number_input(
+        st.number_input(
             "Estimated budget (million)",
             min_value=0.0,
             step=10.0,
             format="%.2f",
+            key="project_budget",
         )
 
-    status_label = st.selectbox(
+    st.selectbox(
         "Initial status",
-        options=list(status_options_map.keys()),
+        options=PROJECT_STATUS_OPTIONS,
         index=1,  # default to "Open"
+        key="project_status",
+    )
+    st.form_submit_button(
+        "Create project",
+        on_click=_create_project_submitted,
+        args=(selected_dev_id, selected_dev.name),
     )
-    submitted_project = st.form_submit_button("Create project")
-
-    if submitted_project:
-        if not name.strip():
-            st.error("Project name is required.")
-        else:
-            try:
-                project = create_project(
-                    db=db,
-                    developer_company_id=selected_dev_id,
-                    name=name.strip(),
-                    location=location.strip() or None,
-                    project_type=project_type or None,
-                    description=description.strip() or None,
-                    built_up_area_m2=built_up_area_m2 or None,
-                    estimated_budget_million=estimated_budget_million or None,
-                    status=status_options_map[status_label],
-                )
-                st.success(f"Project **{project.name}** created for developer **{selected_dev.name}**.")
-            except Exception as e:
-                st.error(f"Could not create project: {e}")
+
+    show_form_feedback("create_project_form")
 
 
 st.markdown("---")
@@ -126,78 +143,94 @@ st.markdown("---")
 # ---------------------------------------
 st.subheader("3. Projects for this developer")
 
-projects = list_projects(db, developer_company_id=selected_dev_id)
+with db_session() as db:
+    # Loaded attributes stay readable after the session closes (expire_on_commit=False)
+    projects = list_projects_with_requirements(db, developer_company_id=selected_dev_id)
 
 if not projects:
     st.info("No projects created yet for this developer.")
     st.stop()
 
-capabilities = list_capabilities(db)
+capabilities = cached_list_capabilities()
 cap_options = {cap.name: cap.id for cap in capabilities} if capabilities else {}
 
-for proj in projects:
-    with st.expander(f"[{proj.id}] {proj.name}  ({proj.status.value})", expanded=False):
-        st.write(f"**Location:** {proj.location or '-'}")
-        st.write(f"**Type:** {proj.project_type or '-'}")
-        st.write(f"**BUA:** {proj.built_up_area_m2 or '-'} m²")
-        st.write(f"**Budget:** {proj.estimated_budget_million or '-'} million")
-        st.write(f"**Description:** {proj.description or '-'}")
-
-        st.markdown("### Requirements")
-
-        # Show existing requirements
-        reqs = list_project_requirements(db, project_id=proj.id)
-
-        if not reqs:
-            st.info("No requirements defined yet for this project.")
-        else:
-            for r in reqs:
-                st.write(
-                    f"- **{r.capability.name}** "
-                    f"(min exp: {r.min_experience_years or '-'} years, "
-                    f"min contract value: {r.min_contract_value_million or '-'} million)"
-                )
-
-        st.markdown("#### Add new requirement")
-
-        if not capabilities:
-            st.warning("No capabilities defined yet. Go to **Companies & Capabilities** page and create some.")
-        else:
-            with st.form(f"add_req_form_{proj.id}"):
-                selected_cap_name = st.selectbox(
-                    "Capability",
-                    options=list(cap_options.keys()),
-                    key=f"cap_select_proj_{proj.id}",
-                )
-                selected_cap_id = cap_options[selected_cap_name]
-
-                colr1, colr2 = st.columns(2)
-                with colr1:
-                    min_exp_years = st.number_input(
-                        "Minimum experience (years)",
-                        min_value=0.0,
-                        step=0.5,
-                        key=f"min_exp_{proj.id}",
-                    )
-                with colr2:
-                    min_contract_value = st.number_input(
-                        "Minimum similar contract value (million)",
-                        min_value=0.0,
-                        step=5.0,
-                        key=f"min_value_{proj.id}",
-                    )
-
-                submitted_req = st.form_submit_button("Add requirement")
-
-                if submitted_req:
-                    try:
-                        add_project_requirement(
-                            db=db,
-                            project_id=proj.id,
-                            capability_id=selected_cap_id,
-                            min_experience_years=min_exp_years or None,
-                            min_contract_value_million=min_contract_value or None,
-                        )
-                        st.success("Requirement added. Collapse and expand again to refresh.")
-                    except Exception as e:
-                        st.error(f"Could not add requirement: {e}")
+projects_df = pd.DataFrame(
+    [
+        {
+            "ID": proj.id,
+            "Name": proj.name,
+            "Status": proj.status.value,
+            "Location": proj.location,
+            "Type": proj.project_type,
+            "BUA (m²)": proj.built_up_area_m2,
+            "Budget (million)": proj.estimated_budget_million,
+            "Description": proj.description,
+        }
+        for proj in projects
+    ]
+)
+st.dataframe(projects_df, hide_index=True, width="stretch")
+
+st.markdown("### Requirements")
+
+# Requirements are preloaded with the project list
+requirements_df = pd.DataFrame(
+    [
+        {
+            "Project": proj.name,
+            "Capability": r.capability.name,
+            "Min experience (years)": r.min_experience_years,
+            "Min contract value (million)": r.min_contract_value_million,
+        }
+        for proj in projects
+        for r in proj.requirements
+    ]
+)
+if requirements_df.empty:
+    st.info("No requirements defined yet for this developer's projects.")
+else:
+    st.dataframe(requirements_df, hide_index=True, width="stretch")
+
+
+st.markdown("#### Add new requirement")
+
+if not capabilities:
+    st.warning("No capabilities defined yet. Go to **Companies & Capabilities** page and create some.")
+else:
+    proj_options = {f"[{p.id}] {p.name}": p.id for p in projects}
+
+    with st.form("add_req_form"):
+        st.selectbox(
+            "Project",
+            options=list(proj_options.keys()),
+            key="req_project_select",
+        )
+        st.selectbox(
+            "Capability",
+            options=list(cap_options.keys()),
+            key="cap_select_proj",
+        )
+
+        colr1, colr2 = st.columns(2)
+        with colr1:
+            st.number_input(
+                "Minimum experience (years)",
+                min_value=0.0,
+                step=0.5,
+                key="min_exp",
+            )
+        with colr2:
+            st.number_input(
+                "Minimum similar contract value (million)",
+                min_value=0.0,
+                step=5.0,
+                key="min_value",
+            )
+
+        st.form_submit_button(
+            "Add requirement",
+            on_click=_add_requirement_submitted,
+            args=(proj_options, cap_options),
+        )
+
+        show_form_feedback("add_req_form")
@@ -1,16 +1,26 @@
 # pages/3_Matching_and_Prequalification.py
 
+import pandas as pd
 import streamlit as st
 
-from db import get_db
-from models import CompanyType, PrequalificationStatus
+from cache import (
+    cached_list_project_requirements,
+    cached_list_projects,
+    cached_prequalification_responses,
+    MATCHES_MEMO_KEY,
+)
+from db import db_session
 from services import (
-    list_companies,
-    list_projects,
-    list_project_requirements,
+    MATCH_TOP_K,
     match_contractors_for_project,
-    list_prequalification_responses_for_project,
-    create_or_update_prequalification_response,
+    bulk_upsert_prequalification,
+)
+from ui import (
+    PREQUALIFICATION_LABEL_BY_STATUS,
+    PREQUALIFICATION_STATUS_BY_LABEL,
+    PREQUALIFICATION_STATUS_OPTIONS,
+    SELECT_OPTIONS_LIMIT,
+    select_developer,
 )
 
 st.title("Matching & Prequalification")
@@ -22,27 +32,13 @@ This page helps you **match contractors** to a specific project based on its
 """
 )
 
-db = next(get_db())
-
 # ---------------------------------------
 # 1) Select developer
 # ---------------------------------------
 st.subheader("1. Select developer company")
 
-developers = list_companies(db, company_type=CompanyType.DEVELOPER)
-
-if not developers:
-    st.warning("No developer companies found. Go to **Companies & Capabilities** page and create at least one Developer.")
-    st.stop()
-
-dev_options = {f"[{c.id}] {c.name}": c.id for c in developers}
-selected_dev_label = st.selectbox(
-    "Developer",
-    options=list(dev_options.keys()),
-)
-selected_dev_id = dev_options[selected_dev_label]
-
-selected_dev = next((d for d in developers if d.id == selected_dev_id), None)
+selected_dev = select_developer()
+selected_dev_id = selected_dev.id
 st.info(f"Selected developer: **{selected_dev.name}**")
 
 # ---------------------------------------
@@ -50,19 +46,27 @@ st.info(f"Selected developer: **{selected_dev.name}**")
 # ---------------------------------------
 st.subheader("2. Select project")
 
-projects = list_projects(db, developer_company_id=selected_dev_id)
+proj_prefix = st.text_input("Filter projects by name", key="proj_name_prefix").strip()
+projects = cached_list_projects(selected_dev_id, name_prefix=proj_prefix, limit=SELECT_OPTIONS_LIMIT + 1)
 
 if not projects:
-    st.warning("This developer has no projects yet. Go to **Projects & Requirements** page and create one.")
+    if proj_prefix:
+        st.warning(f"No project names for this developer start with **{proj_prefix}**.")
+    else:
+        st.warning("This developer has no projects yet. Go to **Projects & Requirements** page and create one.")
     st.stop()
+if len(projects) > SELECT_OPTIONS_LIMIT:
+    projects = projects[:SELECT_OPTIONS_LIMIT]
+    st.caption(f"Showing the {SELECT_OPTIONS_LIMIT} newest projects; type more of the name to narrow the list.")
 
+proj_by_id = {p.id: p for p in projects}
 proj_options = {f"[{p.id}] {p.name} ({p.status.value})": p.id for p in projects}
 selected_proj_label = st.selectbox(
     "Project",
     options=list(proj_options.keys()),
 )
 selected_proj_id = proj_options[selected_proj_label]
-selected_project = next((p for p in projects if p.id == selected_proj_id), None)
+selected_project = proj_by_id[selected_proj_id]
 
 st.markdown(
     f"""
@@ -80,13 +84,13 @@ st.markdown(
 # Show project requirements
 st.markdown("### Project requirements")
 
-reqs = list_project_requirements(db, project_id=selected_proj_id)
+reqs = cached_list_project_requirements(selected_proj_id)
 if not reqs:
     st.warning("No requirements defined yet for this project. Matching will not be effective.")
 else:
     for r in reqs:
         st.write(
-            f"- **{r.capability.name}** "
+            f"- **{r.capability_name}** "
             f"(min exp: {r.min_experience_years or '-'} years, "
             f"min contract value: {r.min_contract_value_million or '-'} million)"
         )
@@ -98,87 +102,130 @@ st.markdown("---")
 # ---------------------------------------
 st.subheader("3. Matching contractors for this project")
 
+if not reqs:
+    st.info("Add requirements on the **Projects & Requirements** page to match contractors to this project.")
+    st.stop()
+
 if st.button("Run matching", type="primary"):
     st.session_state["run_matching"] = True
+    # Explicit re-run: drop the memoized ranking
+    st.session_state.pop(MATCHES_MEMO_KEY, None)
 
 if st.session_state.get("run_matching", False):
-    matches = match_contractors_for_project(db, project_id=selected_proj_id)
+    # Saving a decision or editing notes reruns the page; reuse the ranking
+    # computed for this project and requirement set instead of re-running the
+    # matching query. Selecting another project / developer or changing its
+    # requirements changes the key and recomputes; writes on the other pages
+    # drop the memo (clear_cached_data()).
+    memo_key = (
+        selected_proj_id,
+        tuple((r.id, r.min_experience_years, r.min_contract_value_million) for r in reqs),
+    )
+    memo = st.session_state.get(MATCHES_MEMO_KEY)
+    if memo is not None and memo["key"] == memo_key:
+        matches = memo["matches"]
+    else:
+        with db_session() as db:
+            # One extra row tells whether the ranking was cut off at MATCH_TOP_K
+            matches = match_contractors_for_project(db, project_id=selected_proj_id, top_k=MATCH_TOP_K + 1)
+        st.session_state[MATCHES_MEMO_KEY] = {"key": memo_key, "matches": matches}
+
+    truncated = len(matches) > MATCH_TOP_K
+    matches = matches[:MATCH_TOP_K]
 
     if not matches:
         st.info("No matching contractors found for this project based on current requirements and capabilities.")
     else:
-        st.success(f"Found **{len(matches)}** matching contractor(s). Ranked by score.")
-
-        # Load existing prequalification responses for this project
-        existing_resps = list_prequalification_responses_for_project(db, project_id=selected_proj_id)
-        resp_by_contractor = {r.contractor_company_id: r for r in existing_resps}
+        if truncated:
+            st.success(f"Showing the top **{MATCH_TOP_K}** matching contractors. Ranked by score.")
+            st.caption("More contractors match this project; only the highest-ranked are listed.")
+        else:
+            st.success(f"Found **{len(matches)}** matching contractor(s). Ranked by score.")
 
-        # status label mapping
-        status_label_to_enum = {
-            "Interested": PrequalificationStatus.INTERESTED,
-            "Submitted": PrequalificationStatus.SUBMITTED,
-            "Shortlisted": PrequalificationStatus.SHORTLISTED,
-            "Rejected": PrequalificationStatus.REJECTED,
-        }
-        status_enum_to_label = {v: k for k, v in status_label_to_enum.items()}
+        # Existing decisions, keyed by contractor id (cached until the next save)
+        resp_by_contractor = cached_prequalification_responses(selected_proj_id)
 
+        # Status / Notes are edited in place; everything else is read-only
+        decision_rows = []
         for company, score, matched_count in matches:
-            existing_resp = resp_by_contractor.get(company.id)
-
-            with st.expander(
-                f"[{company.id}] {company.name} – Score: {score:.2f} (matched {matched_count} requirement(s))",
-                expanded=False,
-            ):
-                st.write(f"**Location:** {(company.city or '-')}, {(company.country or '-')}")
-                st.write(f"**Website:** {company.website or '-'}")
-                st.write(f"**Size:** {company.size_category or '-'}")
-                st.write(f"**Description:** {company.description or '-'}")
-
-                if existing_resp:
-                    st.info(
-                        f"Current prequalification status: **{status_enum_to_label.get(existing_resp.status, 'Unknown')}**"
-                    )
-                    existing_notes = existing_resp.notes or ""
-                else:
-                    existing_notes = ""
-
-                st.markdown("#### Set / update prequalification decision")
-
-                status_label_default = (
-                    status_enum_to_label.get(existing_resp.status)
-                    if existing_resp
-                    else "Interested"
-                )
+            resp = resp_by_contractor.get(company.id)
+            decision_rows.append(
+                {
+                    "ID": company.id,
+                    "Contractor": company.name,
+                    "Score": score,
+                    "Matched": matched_count,
+                    "Location": f"{company.city or '-'}, {company.country or '-'}",
+                    "Website": company.website,
+                    "Size": company.size_category,
+                    "Description": company.description,
+                    "Status": PREQUALIFICATION_LABEL_BY_STATUS.get(resp.status) if resp else None,
+                    "Notes": resp.notes if resp else None,
+                }
+            )
+        decisions_df = pd.DataFrame(decision_rows)
+
+        st.markdown("#### Set / update prequalification decisions")
+        st.caption("Edit **Status** / **Notes** for any contractors, then save once.")
+
+        # The editor keeps unsaved edits by row position; keying it on the
+        # ranked contractor ids resets them when the rows change, so an edit
+        # never moves to a different contractor
+        rows_key = hash(tuple(decisions_df["ID"]))
+        edited_df = st.data_editor(
+            decisions_df,
+            key=f"decisions_editor_{selected_proj_id}_{rows_key}",
+            hide_index=True,
+            width="stretch",
+            num_rows="fixed",
+            disabled=["ID", "Contractor", "Score", "Matched", "Location", "Website", "Size", "Description"],
+            column_config={
+                "Score": st.column_config.NumberColumn("Score", format="%.2f"),
+                "Status": st.column_config.SelectboxColumn(
+                    "Status",
+                    options=PREQUALIFICATION_STATUS_OPTIONS,
+                    help="Empty = no decision yet; rows without a status are not saved",
+                ),
+                "Notes": st.column_config.TextColumn("Notes"),
+            },
+        )
 
-                status_label = st.selectbox(
-                    "Prequalification status",
-                    options=list(status_label_to_enum.keys()),
-                    index=list(status_label_to_enum.keys()).index(status_label_default),
-                    key=f"status_{selected_proj_id}_{company.id}",
-                )
-                notes = st.text_area(
-                    "Notes (optional)",
-                    value=existing_notes,
-                    key=f"notes_{selected_proj_id}_{company.id}",
+        if st.button("Save all decisions", key=f"save_decisions_{selected_proj_id}"):
+            # Only rows whose Status / Notes actually changed are written
+            editable = ["Status", "Notes"]
+            before = decisions_df[editable].fillna("")
+            after = edited_df[editable].fillna("")
+            changed = edited_df.assign(**after)[(after != before).any(axis=1)]
+            # A decision needs a status; an emptied or never-set Status is not
+            # a value to save (and is not turned into a default one)
+            no_status = changed[changed["Status"] == ""]
+            changed = changed[changed["Status"] != ""]
+            if not no_status.empty:
+                st.warning(
+                    "Not saved (pick a Status first): "
+                    + ", ".join(f"**{name}**" for name in no_status["Contractor"])
                 )
-
-                if st.button(
-                    "Save decision",
-                    key=f"save_decision_{selected_proj_id}_{company.id}",
-                ):
-                    try:
-                        resp = create_or_update_prequalification_response(
+            if changed.empty:
+                if no_status.empty:
+                    st.info("No decision changes to save.")
+            else:
+                try:
+                    with db_session() as db:
+                        saved = bulk_upsert_prequalification(
                             db=db,
                             project_id=selected_proj_id,
-                            contractor_company_id=company.id,
-                            status=status_label_to_enum[status_label],
-                            notes=notes.strip() or None,
-                        )
-                        st.success(
-                            f"Decision saved: {company.name} → {status_label} "
-                            f"(response id: {resp.id})"
+                            rows=[
+                                {
+                                    "contractor_company_id": int(row.ID),
+                                    "status": PREQUALIFICATION_STATUS_BY_LABEL[row.Status],
+                                    "notes": row.Notes.strip() or None,
+                                }
+                                for row in changed.itertuples(index=False)
+                            ],
                         )
-                    except Exception as e:
-                        st.error(f"Could not save decision: {e}")
+                    cached_prequalification_responses.clear(selected_proj_id)
+                    st.success(f"Saved **{saved}** decision(s).")
+                except Exception as e:
+                    st.error(f"Could not save decisions: {e}")
 else:
     st.info("Click **Run matching** to see ranked contractors for this project.")
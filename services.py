@@ -1,8 +1,11 @@
 # services.py
-from typing import List, Tuple
+from decimal import Decimal
+from typing import List, Sequence, Tuple
 
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy import Row, Select, and_, case, insert, lambda_stmt, literal, or_, select, union, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from models import (
     Company,
@@ -13,7 +16,7 @@ from models import (
     ProjectStatus,
     ProjectRequirement,
     PrequalificationResponse,
-    PrequalificationStatus,
+    ProjectMatchCache,
 )
 
 
@@ -21,6 +24,41 @@ from models import (
 # Companies
 # --------------------
 
+# Listing queries eager-load exactly the relationships the pages render and
+# use raiseload("*") for everything else, so an accidental lazy load raises
+# instead of silently adding a round trip per row.
+
+# The hot per-rerun reads are built with lambda_stmt(): SQLAlchemy caches the
+# statement construction and compiled SQL keyed on the lambda's code, and
+# closure variables (ids, filters) become bound parameters.
+
+def _upsert_insert(db: Session, model):
+    """
+    INSERT construct with on_conflict_do_update() for the bound dialect
+    (PostgreSQL in production, SQLite for local runs).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert(model)
+    return pg_insert(model)
+
+
+def _like_prefix(value: str) -> str:
+    """
+    Case-folded LIKE pattern matching strings that start with value
+    (% and _ in value match literally; use with escape="/").
+    """
+    escaped = value.lower().replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"{escaped}%"
+
+
+def _nullif_zero(column, value):
+    """
+    NULLIF(value, 0) typed like column: the number inputs on the pages use 0
+    for "not set", and the DB stores that as NULL.
+    """
+    return func.nullif(literal(value, column.type), 0)
+
+
 def create_company(
     db: Session,
     name: str,
@@ -30,24 +68,79 @@ def create_company(
     website: str | None = None,
     description: str | None = None,
     size_category: str | None = None,
-) -> Company:
-    company = Company(
-        name=name,
-        company_type=company_type,
-        country=country,
-        city=city,
-        website=website,
-        description=description,
-        size_category=size_category,
+) -> Row:
+    """
+    Returns a (id, name) row from a single INSERT ... RETURNING.
+    """
+    stmt = (
+        insert(Company)
+        .values(
+            name=name,
+            company_type=company_type,
+            country=country,
+            city=city,
+            website=website,
+            description=description,
+            size_category=size_category,
+        )
+        .returning(Company.id, Company.name)
     )
-    db.add(company)
+    company = db.execute(stmt).one()
     db.commit()
-    db.refresh(company)
     return company
 
 
-def list_companies(db: Session, company_type: CompanyType | None = None) -> List[Company]:
-    stmt = select(Company).order_by(Company.name.asc())
+def list_companies(
+    db: Session,
+    company_type: CompanyType | None = None,
+    name_prefix: str | None = None,
+    limit: int | None = None,
+) -> List[Row]:
+    """
+    Returns plain rows with only the columns the pages render
+    (attribute access works as on Company), skipping ORM instance
+    construction and the identity map.
+    name_prefix filters case-insensitively on the start of the name; on
+    PostgreSQL ix_companies_name_lower_pattern serves it (SQLite can't use
+    an expression index for lower(name) LIKE). limit caps the rows.
+    """
+    stmt = lambda_stmt(
+        lambda: select(
+            Company.id,
+            Company.name,
+            Company.company_type,
+            Company.country,
+            Company.city,
+            Company.website,
+            Company.description,
+            Company.size_category,
+        ).order_by(Company.name.asc())
+    )
+    if company_type:
+        stmt += lambda s: s.where(Company.company_type == company_type)
+    if name_prefix:
+        pattern = _like_prefix(name_prefix)
+        stmt += lambda s: s.where(func.lower(Company.name).like(pattern, escape="/"))
+    if limit:
+        stmt += lambda s: s.limit(limit)
+    return list(db.execute(stmt))
+
+
+def list_companies_with_capabilities(
+    db: Session,
+    company_type: CompanyType | None = None,
+) -> List[Company]:
+    """
+    Companies with capabilities -> capability preloaded (3 queries total).
+    """
+    stmt = (
+        select(Company)
+        .options(
+            selectinload(Company.capabilities).selectinload(CompanyCapability.capability),
+            raiseload("*"),
+        )
+        .order_by(Company.name.asc())
+    )
     if company_type:
         stmt = stmt.where(Company.company_type == company_type)
     return list(db.scalars(stmt))
@@ -61,16 +154,22 @@ def create_capability(
     db: Session,
     name: str,
     description: str | None = None,
-) -> Capability:
-    cap = Capability(name=name, description=description)
-    db.add(cap)
+) -> Row:
+    """
+    Returns a (id, name) row from a single INSERT ... RETURNING.
+    """
+    stmt = (
+        insert(Capability)
+        .values(name=name, description=description)
+        .returning(Capability.id, Capability.name)
+    )
+    cap = db.execute(stmt).one()
     db.commit()
-    db.refresh(cap)
     return cap
 
 
 def list_capabilities(db: Session) -> List[Capability]:
-    stmt = select(Capability).order_by(Capability.name.asc())
+    stmt = select(Capability).options(raiseload("*")).order_by(Capability.name.asc())
     return list(db.scalars(stmt))
 
 
@@ -80,40 +179,45 @@ def add_capability_to_company(
     capability_id: int,
     experience_years: float | None = None,
     typical_project_size_m2: float | None = None,
-    typical_contract_value_million: float | None = None,
-) -> CompanyCapability:
-    # upsert-like: check if exists
-    stmt = select(CompanyCapability).where(
-        CompanyCapability.company_id == company_id,
-        CompanyCapability.capability_id == capability_id,
+    typical_contract_value_million: float | Decimal | None = None,
+) -> Row:
+    """
+    Returns the (id, company_id, capability_id) row that was written.
+    """
+    _lock_match_inputs(db, capability_ids=[capability_id])
+    values = dict(
+        experience_years=_nullif_zero(CompanyCapability.experience_years, experience_years),
+        typical_project_size_m2=_nullif_zero(CompanyCapability.typical_project_size_m2, typical_project_size_m2),
+        typical_contract_value_million=_nullif_zero(
+            CompanyCapability.typical_contract_value_million,
+            typical_contract_value_million,
+        ),
     )
-    existing = db.scalars(stmt).first()
-    if existing:
-        existing.experience_years = experience_years
-        existing.typical_project_size_m2 = typical_project_size_m2
-        existing.typical_contract_value_million = typical_contract_value_million
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    cc = CompanyCapability(
-        company_id=company_id,
-        capability_id=capability_id,
-        experience_years=experience_years,
-        typical_project_size_m2=typical_project_size_m2,
-        typical_contract_value_million=typical_contract_value_million,
+    returning = (CompanyCapability.id, CompanyCapability.company_id, CompanyCapability.capability_id)
+
+    # upsert-like: UPDATE ... RETURNING, INSERT only when nothing was updated
+    update_stmt = (
+        update(CompanyCapability)
+        .where(
+            CompanyCapability.company_id == company_id,
+            CompanyCapability.capability_id == capability_id,
+        )
+        .values(**values)
+        .returning(*returning)
     )
-    db.add(cc)
+    cc = db.execute(update_stmt).first()
+    if cc is None:
+        insert_stmt = (
+            insert(CompanyCapability)
+            .values(company_id=company_id, capability_id=capability_id, **values)
+            .returning(*returning)
+        )
+        cc = db.execute(insert_stmt).one()
+    refresh_project_match_cache(db, contractor_company_id=company_id)
     db.commit()
-    db.refresh(cc)
     return cc
 
 
-def list_company_capabilities(db: Session, company_id: int) -> List[CompanyCapability]:
-    stmt = select(CompanyCapability).where(CompanyCapability.company_id == company_id)
-    return list(db.scalars(stmt))
-
-
 # --------------------
 # Projects
 # --------------------
@@ -126,27 +230,67 @@ def create_project(
     project_type: str | None = None,
     description: str | None = None,
     built_up_area_m2: float | None = None,
-    estimated_budget_million: float | None = None,
+    estimated_budget_million: float | Decimal | None = None,
     status: ProjectStatus = ProjectStatus.OPEN,
-) -> Project:
-    project = Project(
-        developer_company_id=developer_company_id,
-        name=name,
-        location=location,
-        project_type=project_type,
-        description=description,
-        built_up_area_m2=built_up_area_m2,
-        estimated_budget_million=estimated_budget_million,
-        status=status,
+) -> Row:
+    """
+    Returns a (id, name) row from a single INSERT ... RETURNING.
+    """
+    stmt = (
+        insert(Project)
+        .values(
+            developer_company_id=developer_company_id,
+            name=name,
+            location=location,
+            project_type=project_type,
+            description=description,
+            built_up_area_m2=_nullif_zero(Project.built_up_area_m2, built_up_area_m2),
+            estimated_budget_million=_nullif_zero(Project.estimated_budget_million, estimated_budget_million),
+            status=status,
+        )
+        .returning(Project.id, Project.name)
     )
-    db.add(project)
+    project = db.execute(stmt).one()
     db.commit()
-    db.refresh(project)
     return project
 
 
-def list_projects(db: Session, developer_company_id: int | None = None) -> List[Project]:
-    stmt = select(Project).order_by(Project.created_at.desc())
+def list_projects(
+    db: Session,
+    developer_company_id: int | None = None,
+    name_prefix: str | None = None,
+    limit: int | None = None,
+) -> List[Project]:
+    """
+    name_prefix filters case-insensitively on the start of the project name;
+    limit caps the rows (newest first).
+    """
+    stmt = lambda_stmt(lambda: select(Project).options(raiseload("*")).order_by(Project.created_at.desc()))
+    if developer_company_id:
+        stmt += lambda s: s.where(Project.developer_company_id == developer_company_id)
+    if name_prefix:
+        pattern = _like_prefix(name_prefix)
+        stmt += lambda s: s.where(func.lower(Project.name).like(pattern, escape="/"))
+    if limit:
+        stmt += lambda s: s.limit(limit)
+    return list(db.scalars(stmt))
+
+
+def list_projects_with_requirements(
+    db: Session,
+    developer_company_id: int | None = None,
+) -> List[Project]:
+    """
+    Projects with requirements -> capability preloaded (3 queries total).
+    """
+    stmt = (
+        select(Project)
+        .options(
+            selectinload(Project.requirements).selectinload(ProjectRequirement.capability),
+            raiseload("*"),
+        )
+        .order_by(Project.created_at.desc())
+    )
     if developer_company_id:
         stmt = stmt.where(Project.developer_company_id == developer_company_id)
     return list(db.scalars(stmt))
@@ -157,22 +301,37 @@ def add_project_requirement(
     project_id: int,
     capability_id: int,
     min_experience_years: float | None = None,
-    min_contract_value_million: float | None = None,
-) -> ProjectRequirement:
-    req = ProjectRequirement(
-        project_id=project_id,
-        capability_id=capability_id,
-        min_experience_years=min_experience_years,
-        min_contract_value_million=min_contract_value_million,
+    min_contract_value_million: float | Decimal | None = None,
+) -> Row:
+    """
+    Returns the (id, project_id, capability_id) row from a single INSERT ... RETURNING.
+    """
+    _lock_match_inputs(db, project_id=project_id, capability_ids=[capability_id])
+    stmt = (
+        insert(ProjectRequirement)
+        .values(
+            project_id=project_id,
+            capability_id=capability_id,
+            min_experience_years=_nullif_zero(ProjectRequirement.min_experience_years, min_experience_years),
+            min_contract_value_million=_nullif_zero(
+                ProjectRequirement.min_contract_value_million,
+                min_contract_value_million,
+            ),
+        )
+        .returning(ProjectRequirement.id, ProjectRequirement.project_id, ProjectRequirement.capability_id)
     )
-    db.add(req)
+    req = db.execute(stmt).one()
+    refresh_project_match_cache(db, project_id=project_id)
     db.commit()
-    db.refresh(req)
     return req
 
 
 def list_project_requirements(db: Session, project_id: int) -> List[ProjectRequirement]:
-    stmt = select(ProjectRequirement).where(ProjectRequirement.project_id == project_id)
+    stmt = lambda_stmt(
+        lambda: select(ProjectRequirement)
+        .where(ProjectRequirement.project_id == project_id)
+        .options(selectinload(ProjectRequirement.capability), raiseload("*"))
+    )
     return list(db.scalars(stmt))
 
 
@@ -180,43 +339,54 @@ def list_project_requirements(db: Session, project_id: int) -> List[ProjectRequi
 # Prequalification
 # --------------------
 
-def create_or_update_prequalification_response(
+def bulk_upsert_prequalification(
     db: Session,
     project_id: int,
-    contractor_company_id: int,
-    status: PrequalificationStatus = PrequalificationStatus.INTERESTED,
-    notes: str | None = None,
-) -> PrequalificationResponse:
-    stmt = select(PrequalificationResponse).where(
-        PrequalificationResponse.project_id == project_id,
-        PrequalificationResponse.contractor_company_id == contractor_company_id,
+    rows: List[dict],
+) -> int:
+    """
+    Upserts many decisions for one project in a single multi-row
+    INSERT ... ON CONFLICT DO UPDATE and one commit.
+    rows: dicts with contractor_company_id, status and notes.
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+
+    stmt = _upsert_insert(db, PrequalificationResponse).values(
+        [
+            dict(
+                project_id=project_id,
+                contractor_company_id=row["contractor_company_id"],
+                status=row["status"],
+                notes=row["notes"],
+            )
+            for row in rows
+        ]
     )
-    existing = db.scalars(stmt).first()
-    if existing:
-        existing.status = status
-        existing.notes = notes
-        db.commit()
-        db.refresh(existing)
-        return existing
-
-    resp = PrequalificationResponse(
-        project_id=project_id,
-        contractor_company_id=contractor_company_id,
-        status=status,
-        notes=notes,
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "contractor_company_id"],
+        # set_ bypasses Column.onupdate, so bump updated_at explicitly
+        set_={
+            "status": stmt.excluded.status,
+            "notes": stmt.excluded.notes,
+            "updated_at": func.now(),
+        },
     )
-    db.add(resp)
+    db.execute(stmt)
     db.commit()
-    db.refresh(resp)
-    return resp
+    return len(rows)
 
 
 def list_prequalification_responses_for_project(
     db: Session,
     project_id: int,
 ) -> List[PrequalificationResponse]:
-    stmt = select(PrequalificationResponse).where(
-        PrequalificationResponse.project_id == project_id
+    # The page only reads scalar columns; any relationship access should fail loudly
+    stmt = (
+        select(PrequalificationResponse)
+        .where(PrequalificationResponse.project_id == project_id)
+        .options(raiseload("*"))
     )
     return list(db.scalars(stmt))
 
@@ -225,53 +395,194 @@ def list_prequalification_responses_for_project(
 # Matching logic
 # --------------------
 
-def match_contractors_for_project(
+# How many ranked contractors matching returns by default
+MATCH_TOP_K = 50
+
+
+def _lock_match_inputs(
     db: Session,
-    project_id: int,
-) -> List[Tuple[Company, float, int]]:
+    project_id: int | None = None,
+    capability_ids: Sequence[int] | Select = (),
+) -> None:
     """
-    Returns list of (contractor_company, match_score, matched_capabilities_count)
-    sorted by score descending.
-
-    Simple scoring:
-    - For each required capability, check if contractor has it.
-    - Score = number of matched required capabilities.
+    Locks the project row and the capability rows (SELECT ... FOR UPDATE,
+    held until the caller commits) before a write that refreshes
+    project_match_cache. capability_ids may be a SELECT of ids.
+
+    Under READ COMMITTED each refresh's INSERT ... SELECT only sees
+    committed rows, so a requirement and a company capability for the same
+    capability committed concurrently would each miss the other and leave
+    the pair missing from the cache. Both writers lock the capability row
+    first, so the second one waits and then reads the first one's row.
+    Order: the project, then capabilities by id. Skipped on SQLite, which
+    allows one writer at a time anyway.
     """
+    if db.get_bind().dialect.name == "sqlite":
+        return
+    if project_id is not None:
+        db.execute(select(Project.id).where(Project.id == project_id).with_for_update())
+    if isinstance(capability_ids, Select) or capability_ids:
+        db.execute(
+            select(Capability.id)
+            .where(Capability.id.in_(capability_ids))
+            .order_by(Capability.id)
+            .with_for_update()
+        )
 
-    project = db.get(Project, project_id)
-    if not project:
-        return []
-
-    # Get the requirements for this project
-    req_stmt = select(ProjectRequirement).where(ProjectRequirement.project_id == project_id)
-    requirements = list(db.scalars(req_stmt))
-    if not requirements:
-        return []
 
+def refresh_project_match_cache(
+    db: Session,
+    project_id: int | None = None,
+    contractor_company_id: int | None = None,
+) -> None:
+    """
+    Recomputes the project_match_cache rows for one project and/or one
+    contractor (all rows if neither is given) with a single INSERT ... SELECT
+    ... GROUP BY ... ON CONFLICT DO UPDATE, so concurrent refreshes of the
+    same (project, contractor) pair don't collide on the primary key.
+    Runs in the caller's transaction; does not commit.
+
+    Rows are only ever added or updated: the write helpers never remove a
+    requirement or capability, and deleting a project / company cascades.
+    """
     cc = CompanyCapability
     c = Company
     r = ProjectRequirement
+    m = ProjectMatchCache
+
+    # A requirement counts towards the score when the contractor meets both
+    # thresholds; an unset (NULL) threshold is always met
+    meets_thresholds = and_(
+        or_(r.min_experience_years.is_(None), cc.experience_years >= r.min_experience_years),
+        or_(
+            r.min_contract_value_million.is_(None),
+            cc.typical_contract_value_million >= r.min_contract_value_million,
+        ),
+    )
+    score = func.sum(case((meets_thresholds, 1), else_=0))
 
-    # Join contractors with capabilities and requirements
-    join_stmt = (
-        select(
-            c,
-            func.count(r.id).label("matched_count"),
-        )
+    source = (
+        select(r.project_id, c.id, func.count(r.id), score)
         .join(cc, c.id == cc.company_id)
         .join(r, cc.capability_id == r.capability_id)
         .where(c.company_type == CompanyType.CONTRACTOR)
-        .where(r.project_id == project_id)
-        .group_by(c.id)
+        .group_by(r.project_id, c.id)
     )
+    # source always has a WHERE clause, which SQLite needs to parse
+    # INSERT ... SELECT ... ON CONFLICT unambiguously
+    if project_id is not None:
+        source = source.where(r.project_id == project_id)
+    if contractor_company_id is not None:
+        source = source.where(c.id == contractor_company_id)
+
+    stmt = _upsert_insert(db, m).from_select(
+        ["project_id", "contractor_company_id", "matched_count", "score"],
+        source,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["project_id", "contractor_company_id"],
+        set_={
+            "matched_count": stmt.excluded.matched_count,
+            "score": stmt.excluded.score,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
 
-    rows = db.execute(join_stmt).all()
+def backfill_project_match_cache(db: Session) -> int:
+    """
+    Recomputes project_match_cache for every project whose cached rows are
+    missing or older than the data they were computed from, then commits.
+    Runs once per process, from db.get_engine(); between runs the write
+    helpers keep the cache current.
+
+    A project is stale when a matching contractor capability has no cached
+    row for its contractor or was written after that row, or when one of its
+    requirements was written after its oldest cached row (created_at /
+    updated_at against project_match_cache.updated_at). This picks up
+    databases created before the cache existed and rows written outside
+    the write helpers (seeds, bulk imports).
+    Returns the number of projects recomputed.
+    """
+    cc = CompanyCapability
+    c = Company
+    r = ProjectRequirement
+    m = ProjectMatchCache
+
+    stale_pairs = (
+        select(r.project_id)
+        .join(cc, cc.capability_id == r.capability_id)
+        .join(c, c.id == cc.company_id)
+        .outerjoin(m, and_(m.project_id == r.project_id, m.contractor_company_id == c.id))
+        .where(
+            c.company_type == CompanyType.CONTRACTOR,
+            or_(m.updated_at.is_(None), func.coalesce(cc.updated_at, cc.created_at) > m.updated_at),
+        )
+    )
+    cached_at = select(func.min(m.updated_at)).where(m.project_id == r.project_id).scalar_subquery()
+    stale_requirements = select(r.project_id).where(func.coalesce(r.updated_at, r.created_at) > cached_at)
+
+    project_ids = list(db.scalars(union(stale_pairs, stale_requirements)))
+    for project_id in project_ids:
+        _lock_match_inputs(
+            db,
+            project_id=project_id,
+            capability_ids=select(r.capability_id).where(r.project_id == project_id),
+        )
+        refresh_project_match_cache(db, project_id=project_id)
+    db.commit()
+    return len(project_ids)
+
+
+def match_contractors_for_project(
+    db: Session,
+    project_id: int,
+    top_k: int = MATCH_TOP_K,
+) -> List[Tuple[Row, float, int]]:
+    """
+    Returns the top_k (contractor_row, match_score, matched_capabilities_count)
+    sorted by score descending. Ranking and the limit run in SQL.
+    contractor_row carries only the columns the matching page renders
+    (id, name, city, country, website, size_category, description).
+
+    Read-only: reads the precomputed project_match_cache (kept current by
+    the write helpers, backfilled once per process by db.get_engine()).
+
+    Scoring:
+    - matched_capabilities_count = required capabilities the contractor has.
+    - Score = matched requirements where the contractor also meets
+      min_experience_years and min_contract_value_million (unset = met).
+    Ties on score are broken by matched count, then name.
+    """
+
+    # An indexed read of this project's cached counts (primary key leads with
+    # project_id), joined to the contractor columns
+    stmt = lambda_stmt(
+        lambda: select(
+            Company.id,
+            Company.name,
+            Company.city,
+            Company.country,
+            Company.website,
+            Company.size_category,
+            Company.description,
+            ProjectMatchCache.matched_count,
+            ProjectMatchCache.score,
+        )
+        .join(ProjectMatchCache, ProjectMatchCache.contractor_company_id == Company.id)
+        .where(ProjectMatchCache.project_id == project_id)
+        .order_by(
+            ProjectMatchCache.score.desc(),
+            ProjectMatchCache.matched_count.desc(),
+            Company.name.asc(),
+        )
+        .limit(top_k)
+    )
 
-    results: List[Tuple[Company, float, int]] = []
-    for company, matched_count in rows:
-        score = float(matched_count)  # simple score = matched requirements count
-        results.append((company, score, matched_count))
+    rows = db.execute(stmt).all()
 
-    # sort by score descending
-    results.sort(key=lambda t: t[1], reverse=True)
+    results: List[Tuple[Row, float, int]] = []
+    for row in rows:
+        results.append((row, float(row.score), row.matched_count))
     return results
@@ -0,0 +1,45 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from streamlit import config
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# db.py reads DB_URL from st.secrets at import; the tests build their own
+# engine, so any URL will do
+_SECRETS = Path(__file__).resolve().parent / "secrets.toml"
+config.set_option("secrets.files", [str(_SECRETS)])
+
+from db import Base, _set_sqlite_pragmas  # noqa: E402
+import models  # noqa: E402,F401  # Ensure models are registered
+
+
+@pytest.fixture
+def engine():
+    """
+    Fresh in-memory SQLite database with the app's PRAGMAs and no tables.
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """
+    Session on a fresh in-memory SQLite database with the app's schema.
+    """
+    Base.metadata.create_all(bind=engine)
+    with Session(engine, autoflush=False, expire_on_commit=False) as session:
+        yield session
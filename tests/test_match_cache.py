@@ -0,0 +1,119 @@
+# tests/test_match_cache.py
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, text, update
+from sqlalchemy.orm import Session
+
+from db import Base, _prepare_schema
+from models import CompanyCapability, CompanyType, ProjectMatchCache, ProjectRequirement
+from services import (
+    add_capability_to_company,
+    add_project_requirement,
+    backfill_project_match_cache,
+    create_capability,
+    create_company,
+    create_project,
+    list_project_requirements,
+    match_contractors_for_project,
+)
+
+
+def _setup(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    first = create_company(db, "Alpha Build", CompanyType.CONTRACTOR)
+    second = create_company(db, "Beta Build", CompanyType.CONTRACTOR)
+    towers = create_capability(db, "High-Rise")
+    villas = create_capability(db, "Villas")
+    project = create_project(db, developer.id, "Tower A")
+    return developer, first, second, towers, villas, project
+
+
+def _backdate_cache(db, project_id):
+    # CURRENT_TIMESTAMP has one-second resolution on SQLite; push the cached
+    # rows clearly before the rows written next
+    db.execute(
+        update(ProjectMatchCache)
+        .where(ProjectMatchCache.project_id == project_id)
+        .values(updated_at=datetime.now(timezone.utc) - timedelta(hours=1))
+    )
+    db.commit()
+
+
+def _ranking(db, project_id):
+    return [(row.name, score, matched) for row, score, matched in match_contractors_for_project(db, project_id)]
+
+
+def test_matching_uses_rows_written_by_the_helpers(db):
+    _, first, second, towers, _, project = _setup(db)
+    add_capability_to_company(db, first.id, towers.id, experience_years=10)
+    add_project_requirement(db, project.id, towers.id, min_experience_years=5)
+    add_capability_to_company(db, second.id, towers.id, experience_years=2)
+
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1), ("Beta Build", 0.0, 1)]
+    assert backfill_project_match_cache(db) == 0
+
+
+def test_capability_imported_outside_the_helpers_is_picked_up(db):
+    _, first, second, towers, _, project = _setup(db)
+    add_capability_to_company(db, first.id, towers.id)
+    add_project_requirement(db, project.id, towers.id)
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1)]
+
+    _backdate_cache(db, project.id)
+    db.execute(insert(CompanyCapability).values(company_id=second.id, capability_id=towers.id))
+    db.commit()
+
+    assert backfill_project_match_cache(db) == 1
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1), ("Beta Build", 1.0, 1)]
+
+
+def test_requirement_imported_outside_the_helpers_is_picked_up(db):
+    _, first, second, towers, villas, project = _setup(db)
+    add_capability_to_company(db, first.id, towers.id)
+    add_capability_to_company(db, second.id, villas.id)
+    add_project_requirement(db, project.id, towers.id)
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1)]
+
+    _backdate_cache(db, project.id)
+    db.execute(insert(ProjectRequirement).values(project_id=project.id, capability_id=villas.id))
+    db.commit()
+
+    assert backfill_project_match_cache(db) == 1
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1), ("Beta Build", 1.0, 1)]
+
+
+def test_project_never_cached_is_computed(db):
+    _, first, _, towers, _, project = _setup(db)
+    add_capability_to_company(db, first.id, towers.id)
+    db.execute(insert(ProjectRequirement).values(project_id=project.id, capability_id=towers.id))
+    db.commit()
+    assert db.scalars(select(ProjectMatchCache.project_id)).all() == []
+
+    assert backfill_project_match_cache(db) == 1
+    assert _ranking(db, project.id) == [("Alpha Build", 1.0, 1)]
+
+
+def test_database_from_before_the_cache_is_upgraded(engine):
+    # The schema as it was before project_match_cache and the
+    # created_at / updated_at columns on the matching inputs
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE project_match_cache"))
+        for table in ("company_capabilities", "project_requirements"):
+            for column in ("created_at", "updated_at"):
+                conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+        conn.execute(text("INSERT INTO companies (id, name, company_type) VALUES (1, 'Dev Co', 'DEVELOPER')"))
+        conn.execute(text("INSERT INTO companies (id, name, company_type) VALUES (2, 'Alpha Build', 'CONTRACTOR')"))
+        conn.execute(text("INSERT INTO capabilities (id, name) VALUES (1, 'High-Rise')"))
+        conn.execute(text("INSERT INTO projects (id, developer_company_id, name, status) VALUES (1, 1, 'Tower A', 'OPEN')"))
+        conn.execute(text("INSERT INTO company_capabilities (company_id, capability_id) VALUES (2, 1)"))
+        conn.execute(text("INSERT INTO project_requirements (project_id, capability_id) VALUES (1, 1)"))
+
+    _prepare_schema(engine)
+    _prepare_schema(engine)
+
+    with Session(engine) as db:
+        assert [r.capability_id for r in list_project_requirements(db, project_id=1)] == [1]
+        assert _ranking(db, 1) == [("Alpha Build", 1.0, 1)]
+        add_project_requirement(db, 1, 1, min_experience_years=3)
+        assert _ranking(db, 1) == [("Alpha Build", 1.0, 2)]
@@ -0,0 +1,200 @@
+# tests/test_services.py
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from models import (
+    Capability,
+    Company,
+    CompanyCapability,
+    CompanyType,
+    PrequalificationStatus,
+    Project,
+    ProjectRequirement,
+    ProjectStatus,
+)
+from services import (
+    _like_prefix,
+    add_capability_to_company,
+    add_project_requirement,
+    bulk_upsert_prequalification,
+    create_capability,
+    create_company,
+    create_project,
+    list_companies,
+    list_prequalification_responses_for_project,
+    list_projects,
+)
+
+
+# --------------------
+# INSERT ... RETURNING writers
+# --------------------
+
+def test_create_company_returns_the_inserted_row(db):
+    company = create_company(db, "Alpha Build", CompanyType.CONTRACTOR, city="Cairo")
+
+    assert company.name == "Alpha Build"
+    stored = db.get(Company, company.id)
+    assert (stored.company_type, stored.city) == (CompanyType.CONTRACTOR, "Cairo")
+
+
+def test_create_capability_and_project_return_the_inserted_rows(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    cap = create_capability(db, "High-Rise", description="Towers")
+    project = create_project(db, developer.id, "Tower A", status=ProjectStatus.DRAFT)
+
+    assert (cap.name, db.get(Capability, cap.id).description) == ("High-Rise", "Towers")
+    assert project.name == "Tower A"
+    assert db.get(Project, project.id).status == ProjectStatus.DRAFT
+
+
+def test_add_capability_to_company_updates_instead_of_duplicating(db):
+    company = create_company(db, "Alpha Build", CompanyType.CONTRACTOR)
+    cap = create_capability(db, "High-Rise")
+
+    first = add_capability_to_company(db, company.id, cap.id, experience_years=3)
+    second = add_capability_to_company(db, company.id, cap.id, experience_years=8)
+
+    assert (second.id, second.company_id, second.capability_id) == (first.id, company.id, cap.id)
+    assert db.scalar(select(func.count()).select_from(CompanyCapability)) == 1
+    assert db.scalar(select(CompanyCapability.experience_years)) == 8
+
+
+def test_add_project_requirement_returns_the_inserted_row(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    cap = create_capability(db, "High-Rise")
+    project = create_project(db, developer.id, "Tower A")
+
+    req = add_project_requirement(db, project.id, cap.id, min_experience_years=5)
+
+    assert (req.project_id, req.capability_id) == (project.id, cap.id)
+    assert db.get(ProjectRequirement, req.id).min_experience_years == 5
+
+
+# --------------------
+# 0 -> NULL, non-negative checks
+# --------------------
+
+def test_zero_inputs_are_stored_as_null(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    cap = create_capability(db, "High-Rise")
+    project = create_project(db, developer.id, "Tower A", built_up_area_m2=0, estimated_budget_million=0)
+    add_capability_to_company(
+        db,
+        developer.id,
+        cap.id,
+        experience_years=0,
+        typical_project_size_m2=0,
+        typical_contract_value_million=Decimal("0"),
+    )
+    req = add_project_requirement(db, project.id, cap.id, min_experience_years=0, min_contract_value_million=0)
+
+    stored = db.get(Project, project.id)
+    assert (stored.built_up_area_m2, stored.estimated_budget_million) == (None, None)
+    assert db.execute(
+        select(
+            CompanyCapability.experience_years,
+            CompanyCapability.typical_project_size_m2,
+            CompanyCapability.typical_contract_value_million,
+        )
+    ).one() == (None, None, None)
+    stored_req = db.get(ProjectRequirement, req.id)
+    assert (stored_req.min_experience_years, stored_req.min_contract_value_million) == (None, None)
+
+
+def test_non_zero_money_keeps_its_decimal_value(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    project = create_project(db, developer.id, "Tower A", estimated_budget_million=Decimal("12.50"))
+
+    assert db.get(Project, project.id).estimated_budget_million == Decimal("12.50")
+
+
+def test_negative_values_are_rejected_by_the_database(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+
+    with pytest.raises(IntegrityError):
+        create_project(db, developer.id, "Tower A", estimated_budget_million=-1)
+
+
+# --------------------
+# Prequalification upsert
+# --------------------
+
+def test_bulk_upsert_inserts_then_updates_in_place(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    first = create_company(db, "Alpha Build", CompanyType.CONTRACTOR)
+    second = create_company(db, "Beta Build", CompanyType.CONTRACTOR)
+    project = create_project(db, developer.id, "Tower A")
+
+    written = bulk_upsert_prequalification(
+        db,
+        project.id,
+        [
+            {"contractor_company_id": first.id, "status": PrequalificationStatus.INTERESTED, "notes": None},
+            {"contractor_company_id": second.id, "status": PrequalificationStatus.INTERESTED, "notes": "call"},
+        ],
+    )
+    assert written == 2
+    ids_before = {r.contractor_company_id: r.id for r in list_prequalification_responses_for_project(db, project.id)}
+    db.expunge_all()
+
+    bulk_upsert_prequalification(
+        db,
+        project.id,
+        [{"contractor_company_id": first.id, "status": PrequalificationStatus.REJECTED, "notes": "too small"}],
+    )
+
+    responses = {r.contractor_company_id: r for r in list_prequalification_responses_for_project(db, project.id)}
+    assert {cid: r.id for cid, r in responses.items()} == ids_before
+    assert (responses[first.id].status, responses[first.id].notes) == (PrequalificationStatus.REJECTED, "too small")
+    assert responses[first.id].updated_at is not None
+    assert (responses[second.id].status, responses[second.id].notes) == (PrequalificationStatus.INTERESTED, "call")
+    assert responses[second.id].updated_at is None
+
+
+def test_bulk_upsert_with_no_rows_writes_nothing(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    project = create_project(db, developer.id, "Tower A")
+
+    assert bulk_upsert_prequalification(db, project.id, []) == 0
+    assert list_prequalification_responses_for_project(db, project.id) == []
+
+
+# --------------------
+# Name prefix filters
+# --------------------
+
+def test_like_prefix_escapes_wildcards():
+    assert _like_prefix("Al") == "al%"
+    assert _like_prefix("50%_a/b") == "50/%/_a//b%"
+
+
+def test_list_companies_filters_by_prefix_and_limit(db):
+    for name in ("Alpha Build", "alpine Works", "Beta Build", "100% Build", "100 Percent"):
+        create_company(db, name, CompanyType.CONTRACTOR)
+    create_company(db, "Alpha Dev", CompanyType.DEVELOPER)
+
+    def names(**kwargs):
+        return [c.name for c in list_companies(db, **kwargs)]
+
+    assert names(name_prefix="al") == ["Alpha Build", "Alpha Dev", "alpine Works"]
+    assert names(company_type=CompanyType.CONTRACTOR, name_prefix="AL") == ["Alpha Build", "alpine Works"]
+    # % and _ match literally
+    assert names(name_prefix="100%") == ["100% Build"]
+    assert names(name_prefix="100_") == []
+    assert names(limit=2) == ["100 Percent", "100% Build"]
+
+
+def test_list_projects_filters_by_prefix_and_limit(db):
+    developer = create_company(db, "Dev Co", CompanyType.DEVELOPER)
+    other = create_company(db, "Other Dev", CompanyType.DEVELOPER)
+    for name in ("Tower A", "Tower B", "Villas"):
+        create_project(db, developer.id, name)
+    create_project(db, other.id, "Tower C")
+
+    towers = list_projects(db, developer_company_id=developer.id, name_prefix="tow")
+    assert sorted(p.name for p in towers) == ["Tower A", "Tower B"]
+    assert len(list_projects(db, developer_company_id=developer.id, limit=2)) == 2
@@ -0,0 +1,112 @@
+# ui.py
+import streamlit as st
+
+from cache import CompanyRow, cached_list_companies
+from models import CompanyType, PrequalificationStatus, ProjectStatus
+
+# Selectboxes over potentially large lists (companies, projects) show at most
+# this many options; a name prefix text input narrows the rest in SQL.
+SELECT_OPTIONS_LIMIT = 50
+
+# Fixed option lists and label <-> enum maps. Page scripts re-execute on every
+# rerun; module-level constants here are built once per process.
+COMPANY_SIZE_OPTIONS = ("", "Small", "Medium", "Large", "Mega")
+
+COMPANY_TYPE_LABELS = (
+    ("Developer", CompanyType.DEVELOPER),
+    ("Contractor", CompanyType.CONTRACTOR),
+)
+COMPANY_TYPE_BY_LABEL = dict(COMPANY_TYPE_LABELS)
+COMPANY_TYPE_OPTIONS = tuple(label for label, _ in COMPANY_TYPE_LABELS)
+
+# Company listing filter; None = all types
+COMPANY_FILTER_LABELS = (
+    ("All", None),
+    ("Developers only", CompanyType.DEVELOPER),
+    ("Contractors only", CompanyType.CONTRACTOR),
+)
+COMPANY_FILTER_BY_LABEL = dict(COMPANY_FILTER_LABELS)
+COMPANY_FILTER_OPTIONS = tuple(label for label, _ in COMPANY_FILTER_LABELS)
+
+PROJECT_TYPE_OPTIONS = (
+    "",
+    "Residential Compound",
+    "Residential Towers",
+    "Commercial Mall",
+    "Mixed-use",
+    "Industrial",
+    "Infrastructure",
+)
+
+PROJECT_STATUS_LABELS = (
+    ("Draft", ProjectStatus.DRAFT),
+    ("Open", ProjectStatus.OPEN),
+    ("Closed", ProjectStatus.CLOSED),
+)
+PROJECT_STATUS_BY_LABEL = dict(PROJECT_STATUS_LABELS)
+PROJECT_STATUS_OPTIONS = tuple(label for label, _ in PROJECT_STATUS_LABELS)
+
+PREQUALIFICATION_STATUS_LABELS = (
+    ("Interested", PrequalificationStatus.INTERESTED),
+    ("Submitted", PrequalificationStatus.SUBMITTED),
+    ("Shortlisted", PrequalificationStatus.SHORTLISTED),
+    ("Rejected", PrequalificationStatus.REJECTED),
+)
+PREQUALIFICATION_STATUS_BY_LABEL = dict(PREQUALIFICATION_STATUS_LABELS)
+PREQUALIFICATION_LABEL_BY_STATUS = {status: label for label, status in PREQUALIFICATION_STATUS_LABELS}
+PREQUALIFICATION_STATUS_OPTIONS = tuple(label for label, _ in PREQUALIFICATION_STATUS_LABELS)
+
+# Form submit callbacks (on_click) run before the page script reruns: invalid
+# input is rejected without touching the DB, and a successful write is already
+# visible in the listings rendered by that same rerun. They can't draw
+# anything themselves, so they leave their outcome in session_state and the
+# form shows it on the rerun.
+
+
+def set_form_feedback(form_key: str, kind: str, message: str) -> None:
+    """
+    kind is "success" or "error".
+    """
+    st.session_state[f"{form_key}_feedback"] = (kind, message)
+
+
+def show_form_feedback(form_key: str) -> None:
+    feedback = st.session_state.pop(f"{form_key}_feedback", None)
+    if feedback is None:
+        return
+    kind, message = feedback
+    if kind == "success":
+        st.success(message)
+    else:
+        st.error(message)
+
+
+def select_developer() -> CompanyRow:
+    """
+    Developer picker shared by the project and matching pages: a name prefix
+    filter in front of a selectbox capped at SELECT_OPTIONS_LIMIT options.
+    Stops the page when no developer is available to pick.
+    """
+    dev_prefix = st.text_input("Filter developers by name", key="dev_name_prefix").strip()
+    # One extra row tells whether the list was cut off
+    developers = cached_list_companies(CompanyType.DEVELOPER.value, name_prefix=dev_prefix, limit=SELECT_OPTIONS_LIMIT + 1)
+
+    if not developers:
+        if dev_prefix:
+            st.warning(f"No developer names start with **{dev_prefix}**.")
+        else:
+            st.warning(
+                "No developer companies found. Go to **Companies & Capabilities** page and create at least one Developer."
+            )
+        st.stop()
+    if len(developers) > SELECT_OPTIONS_LIMIT:
+        developers = developers[:SELECT_OPTIONS_LIMIT]
+        st.caption(f"Showing the first {SELECT_OPTIONS_LIMIT} developers; type more of the name to narrow the list.")
+
+    devs_by_id = {c.id: c for c in developers}
+    dev_options = {f"[{c.id}] {c.name}": c.id for c in developers}
+    selected_dev_label = st.selectbox(
+        "Developer",
+        options=list(dev_options.keys()),
+    )
+    return devs_by_id[dev_options[selected_dev_label]]